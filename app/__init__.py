@@ -18,17 +18,24 @@ from .config import (
     FROM_PHONE_NUMBER,
     TO_PHONE_NUMBER,
     BUFFER_SCALE_FACTOR,
+    VIDEO_SOURCE,
+    INFERENCE_BUDGET_MS,
+    MODEL1_MIN_FPS,
+    INFERENCE_REDUCED_IMGSZ,
     MODEL1_PATH,
     MODEL2_PATH,
     MODEL3_PATH
 )
 from .detection import (
-    run_all_models,
+    load_models,
     SeverityTracker,
+    FrameClock,
+    interval_elapsed,
     BUFFER_SECONDS,
     process_alerts,
     process_review_alert,
     save_video_clip
 )
+from .load_shedding import LoadShedder, DEGRADATION_LEVELS
 from .millis_call import make_emergency_call
 from .telegram_alert import send_telegram_video, extract_metadata_from_message
@@ -24,7 +24,21 @@ TO_PHONE_NUMBER = os.environ.get("TO_PHONE_NUMBER", "Add yours")     # Emergency
 # Buffer Optimization Configuration
 BUFFER_SCALE_FACTOR = float(os.environ.get("BUFFER_SCALE_FACTOR", "0.98"))
 
+# Video Source Configuration
+# Camera index (e.g. "0") or the path/URL of a recorded video or network stream.
+VIDEO_SOURCE = os.environ.get("VIDEO_SOURCE", "0")
+if VIDEO_SOURCE.isdigit():
+    VIDEO_SOURCE = int(VIDEO_SOURCE)
+
+# Load Shedding Configuration
+# Per-frame inference budget in milliseconds (0 uses the source frame interval).
+INFERENCE_BUDGET_MS = float(os.environ.get("INFERENCE_BUDGET_MS", "0"))
+# Model1 is never run at less than this many frames per second, whatever the load.
+MODEL1_MIN_FPS = float(os.environ.get("MODEL1_MIN_FPS", "5"))
+# Model input size (imgsz, a multiple of 32) used once inference resolution is reduced.
+INFERENCE_REDUCED_IMGSZ = int(os.environ.get("INFERENCE_REDUCED_IMGSZ", "320"))
+
 # Model Paths - Update these environment variables with the correct paths for your models.
 MODEL1_PATH = os.environ.get("MODEL1_PATH", "Add yours")
-MODEL2_PATH = os.environ.get("MODEL2_PATH", "Add yours"
+MODEL2_PATH = os.environ.get("MODEL2_PATH", "Add yours")
 MODEL3_PATH = os.environ.get("MODEL3_PATH", "Add yours")
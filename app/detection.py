@@ -5,15 +5,12 @@ import os
 import time
 from datetime import datetime
 from collections import deque
-from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import re
 import requests
-from threading import Thread
-import torch
+from threading import Thread, Lock
 import logging
 
-from ultralytics import YOLO
 from app.millis_call import make_emergency_call
 from app.telegram_alert import send_telegram_video
 from app.config import MODEL1_PATH, MODEL2_PATH, MODEL3_PATH
@@ -33,28 +30,42 @@ HYPERPARAMETERS = {
 # ------------------------
 # GPU Setup: Load models onto GPU if available
 # ------------------------
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# Models are loaded on first use so that importing this module does not pull in torch.
+device = None
+model1 = model2 = model3 = None
+models_lock = Lock()
 
-try:
-    model1 = YOLO(MODEL1_PATH)
-    model1.to(device)
-    logging.info("Model1 loaded successfully from %s", MODEL1_PATH)
-except Exception as e:
-    logging.error("Failed to load Model1: %s", e)
+def load_models():
+    """Load the three YOLO models onto the GPU if available. Later calls are no-ops."""
+    global device, model1, model2, model3
+    with models_lock:
+        if device is not None:
+            return
+        import torch
+        from ultralytics import YOLO
 
-try:
-    model2 = YOLO(MODEL2_PATH)
-    model2.to(device)
-    logging.info("Model2 loaded successfully from %s", MODEL2_PATH)
-except Exception as e:
-    logging.error("Failed to load Model2: %s", e)
+        device = "cuda" if torch.cuda.is_available() else "cpu"
 
-try:
-    model3 = YOLO(MODEL3_PATH)
-    model3.to(device)
-    logging.info("Model3 loaded successfully from %s", MODEL3_PATH)
-except Exception as e:
-    logging.error("Failed to load Model3: %s", e)
+        try:
+            model1 = YOLO(MODEL1_PATH)
+            model1.to(device)
+            logging.info("Model1 loaded successfully from %s", MODEL1_PATH)
+        except Exception as e:
+            logging.error("Failed to load Model1: %s", e)
+
+        try:
+            model2 = YOLO(MODEL2_PATH)
+            model2.to(device)
+            logging.info("Model2 loaded successfully from %s", MODEL2_PATH)
+        except Exception as e:
+            logging.error("Failed to load Model2: %s", e)
+
+        try:
+            model3 = YOLO(MODEL3_PATH)
+            model3.to(device)
+            logging.info("Model3 loaded successfully from %s", MODEL3_PATH)
+        except Exception as e:
+            logging.error("Failed to load Model3: %s", e)
 
 # ------------------------
 # BUFFER_SECONDS for video buffering
@@ -64,9 +75,9 @@ BUFFER_SECONDS = 5
 # ------------------------
 # Model Inference Functions
 # ------------------------
-def run_model1(frame):
+def run_model1(frame, imgsz=None):
     """Run the primary violence detection model."""
-    results = model1(frame)
+    results = model1(frame, imgsz=imgsz) if imgsz else model1(frame)
     detections = []
     for r in results:
         for box in r.boxes:
@@ -78,9 +89,9 @@ def run_model1(frame):
                 detections.append({"confidence": conf, "box": (x1, y1, x2, y2)})
     return detections
 
-def run_model2(frame):
+def run_model2(frame, imgsz=None):
     """Run the lethal object detection model."""
-    results = model2(frame)
+    results = model2(frame, imgsz=imgsz) if imgsz else model2(frame)
     info = []
     for r in results:
         for box in r.boxes:
@@ -90,9 +101,9 @@ def run_model2(frame):
             info.append({"confidence": conf, "box": (x1, y1, x2, y2), "class": cls})
     return info
 
-def run_model3(frame):
+def run_model3(frame, imgsz=None):
     """Run the violence classification model."""
-    results = model3(frame)
+    results = model3(frame, imgsz=imgsz) if imgsz else model3(frame)
     info = []
     for r in results:
         for box in r.boxes:
@@ -102,47 +113,133 @@ def run_model3(frame):
             info.append({"confidence": conf, "box": (x1, y1, x2, y2), "class": cls})
     return info
 
-def run_all_models(frame):
-    """Run all three models concurrently and return their outputs."""
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        future1 = executor.submit(run_model1, frame)
-        future2 = executor.submit(run_model2, frame)
-        future3 = executor.submit(run_model3, frame)
-        result1 = future1.result()
-        result2 = future2.result()
-        result3 = future3.result()
-    return {"model1": result1, "model2": result2, "model3": result3}
+# Runners driven by LoadShedder; call load_models() before the first inference. With a reduced
+# imgsz, Ultralytics still reports boxes in the coordinates of the original frame.
+MODEL_RUNNERS = {
+    "model1": run_model1,
+    "model2": run_model2,
+    "model3": run_model3
+}
+
+# ------------------------
+# Frame Timestamps (Event Time)
+# ------------------------
+class FrameClock:
+    """
+    Stamps captured frames with their capture time so that windowing, rate limiting
+    and clip boundaries are driven by event time rather than processing time.
+
+    Files and network streams carry a presentation timestamp (CAP_PROP_POS_MSEC), which
+    makes recorded or replayed video behave the same at any playback speed. Local cameras
+    (integer sources) are stamped with the monotonic time the frame is grabbed. OpenCV
+    exposes no driver capture stamp for them, so frames queued in the driver buffer during
+    an inference stall get stamps close together; the buffer is kept to one frame where
+    the backend allows it to bound that error.
+    """
+    def __init__(self, source, fps: float):
+        self.use_pts = not isinstance(source, int)
+        self.frame_interval = 1.0 / fps
+        self.pts_offset = 0.0       # Shift applied after PTS jumps backwards (loop, seek, restart)
+        self.last_timestamp = None
+        self.origin_event = None    # Event timestamp of the first frame
+        self.origin_wall = None     # Wall-clock time of the first frame
+        self.origin_mono = None     # Monotonic time the first frame was captured at
+
+    def read(self, cap):
+        """Read the next frame from cap, returning (ret, frame, event timestamp in seconds)."""
+        if not cap.grab():
+            return False, None, None
+        grabbed_at = time.monotonic()
+        ret, frame = cap.retrieve()
+        if not ret:
+            return False, None, None
+        if self.use_pts:
+            timestamp = self._pts_timestamp(cap.get(cv2.CAP_PROP_POS_MSEC))
+        else:
+            timestamp = grabbed_at
+        if self.origin_event is None:
+            self.origin_event = timestamp
+            self.origin_wall = time.time()
+            self.origin_mono = grabbed_at
+        elif self.use_pts and self.to_monotonic(timestamp) > grabbed_at:
+            # Frames decoded ahead of their PTS (faster than real-time replay) were not
+            # captured in the future; re-anchor so capture-to-alert latency stays meaningful.
+            self.origin_mono -= self.to_monotonic(timestamp) - grabbed_at
+        self.last_timestamp = timestamp
+        return True, frame, timestamp
+
+    def _pts_timestamp(self, pts_msec) -> float:
+        if pts_msec is None or pts_msec < 0:
+            # No usable PTS for this frame; assume the nominal frame interval
+            return self.last_timestamp + self.frame_interval if self.last_timestamp is not None else 0.0
+        timestamp = pts_msec / 1000.0 + self.pts_offset
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            # PTS went backwards or stalled; continue the timeline after the last frame
+            self.pts_offset += self.last_timestamp + self.frame_interval - timestamp
+            timestamp = self.last_timestamp + self.frame_interval
+        return timestamp
+
+    def to_monotonic(self, timestamp: float) -> float:
+        """Map an event timestamp onto the monotonic clock, for capture-to-alert latency."""
+        if not self.use_pts:
+            return timestamp
+        return self.origin_mono + (timestamp - self.origin_event)
+
+    def to_wall(self, timestamp: float) -> float:
+        """
+        Map an event timestamp onto wall-clock seconds. For live cameras this is the domain
+        shared by every stream; replayed PTS sources may run ahead of the real clock.
+        """
+        if self.origin_event is None:
+            return time.time()
+        return self.origin_wall + (timestamp - self.origin_event)
+
+    def to_datetime(self, timestamp: float) -> datetime:
+        """Convert an event timestamp into the wall-clock datetime it was captured at."""
+        return datetime.fromtimestamp(self.to_wall(timestamp))
+
+def interval_elapsed(last_time, current_time: float, interval: float) -> bool:
+    """
+    Check whether at least interval seconds of event time have passed since last_time.
+    A last_time in the future (clock stepped back, or a faster-than-real-time replay) counts as elapsed.
+    """
+    return last_time is None or current_time < last_time or (current_time - last_time) >= interval
 
 # ------------------------
 # Sliding Window Severity Tracker
 # ------------------------
 class SeverityTracker:
     def __init__(self, window_size: int):
-        self.window_size = window_size  # in seconds
-        self.detections = deque()       # Each element is a tuple: (timestamp, confidence)
-        self.last_cleanup_time = time.time()
-        self.last_detection_time = time.time()
+        self.window_size = window_size  # in seconds of event time
+        self.detections = deque()       # Each element is a tuple: (timestamp, confidence, weight)
+        self.last_cleanup_time = None
+        self.last_detection_time = None
         self.consecutive_mild_count = 0  # Track consecutive MILD events
 
-    def add_detection(self, timestamp: float, confidence: float):
-        self.detections.append((timestamp, confidence))
+    def add_detection(self, timestamp: float, confidence: float, weight: int = 1):
+        """Record a detection; weight is the number of source frames the inference stands for."""
+        self.detections.append((timestamp, confidence, weight))
         self.last_detection_time = timestamp
-        current_time = time.time()
-        if current_time - self.last_cleanup_time >= 1.0:
-            self._cleanup_old_detections(current_time)
-            self.last_cleanup_time = current_time
+        if self.last_cleanup_time is None or timestamp < self.last_cleanup_time:
+            self.last_cleanup_time = timestamp
+        elif timestamp - self.last_cleanup_time >= 1.0:
+            self._cleanup_old_detections(timestamp)
+            self.last_cleanup_time = timestamp
 
     def _cleanup_old_detections(self, current_time: float):
+        # Detections stamped after current_time came from a timeline running ahead of this one
+        while self.detections and self.detections[-1][0] > current_time:
+            self.detections.pop()
         while self.detections and (current_time - self.detections[0][0]) > self.window_size:
             self.detections.popleft()
-        if current_time - self.last_detection_time > 5.0:
+        if self.last_detection_time is not None and current_time - self.last_detection_time > 5.0:
             self.detections.clear()
 
-    def get_severity(self) -> dict:
-        current_time = time.time()
+    def get_severity(self, current_time: float) -> dict:
+        """Evaluate severity as of current_time, the event timestamp of the latest frame."""
         self._cleanup_old_detections(current_time)
-        count = len(self.detections)
-        max_conf = max((conf for _, conf in self.detections), default=0.0)
+        count = sum(weight for _, _, weight in self.detections)
+        max_conf = max((conf for _, conf, _ in self.detections), default=0.0)
         
         # Determine severity based on sliding window data
         if count >= HYPERPARAMETERS["detection_count_threshold"]:
@@ -209,12 +306,23 @@ def process_review_alert(saved_path, base_message, extra_info):
 # ------------------------
 # Video Saving Helper
 # ------------------------
-def save_video_clip(frame_buffer: deque, output_path: str, fps: int):
-    """Save a clip from the frame buffer to the specified output path."""
-    if not frame_buffer:
+def save_video_clip(frame_buffer: deque, output_path: str, fps: int, start_time: float = None, end_time: float = None):
+    """
+    Save a clip from the frame buffer to the specified output path.
+    The buffer holds (timestamp, frame) tuples; start_time and end_time bound the clip in event time.
+    """
+    clip = [
+        (ts, frame) for ts, frame in frame_buffer
+        if (start_time is None or ts >= start_time) and (end_time is None or ts <= end_time)
+    ]
+    if not clip:
         logging.warning("Frame buffer is empty, cannot save video clip.")
         return None
-    frames = [frame.astype(np.uint8) for frame in frame_buffer]
+    # Derive the playback rate from the capture timestamps so the clip plays back in real time
+    span = clip[-1][0] - clip[0][0]
+    if len(clip) > 1 and span > 0:
+        fps = (len(clip) - 1) / span
+    frames = [frame.astype(np.uint8) for _, frame in clip]
     height, width = frames[0].shape[:2]
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
@@ -0,0 +1,172 @@
+# app/load_shedding.py
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import INFERENCE_BUDGET_MS, MODEL1_MIN_FPS, INFERENCE_REDUCED_IMGSZ
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+# ------------------------
+# Degradation Levels
+# ------------------------
+# Ordered from full quality to the most degraded level the controller may step down to.
+# imgsz is passed to the model runners; None keeps the model's default inference size.
+DEGRADATION_LEVELS = [
+    {"name": "FULL", "models": ("model1", "model2", "model3"), "imgsz": None, "reduce_fps": False},
+    {"name": "SKIP_MODEL3", "models": ("model1", "model2"), "imgsz": None, "reduce_fps": False},
+    {"name": "SKIP_MODEL2", "models": ("model1",), "imgsz": None, "reduce_fps": False},
+    {"name": "REDUCED_RESOLUTION", "models": ("model1",), "imgsz": INFERENCE_REDUCED_IMGSZ, "reduce_fps": False},
+    {"name": "REDUCED_FPS", "models": ("model1",), "imgsz": INFERENCE_REDUCED_IMGSZ, "reduce_fps": True}
+]
+
+MODEL_NAMES = ("model1", "model2", "model3")
+
+# ------------------------
+# Concurrent Model Execution
+# ------------------------
+def run_models(runners: dict, frame, models=MODEL_NAMES, imgsz=None) -> dict:
+    """
+    Run the selected model runners concurrently on frame and return their outputs.
+    Skipped models report no detections.
+    """
+    with ThreadPoolExecutor(max_workers=len(models)) as executor:
+        futures = {name: executor.submit(runners[name], frame, imgsz=imgsz) for name in models}
+        results = {name: future.result() for name, future in futures.items()}
+    return {name: results.get(name, []) for name in MODEL_NAMES}
+
+# ------------------------
+# Adaptive Load Shedding Controller
+# ------------------------
+class LoadShedder:
+    """
+    Watches per-frame inference latency against a target budget and steps through
+    DEGRADATION_LEVELS when inference cannot keep up, recovering once there is headroom.
+    Model1 is never run at less than model1_min_fps.
+
+    The last smoothed latency seen at each level is kept, so headroom at a degraded level
+    only leads back up when the level above last fitted the budget. Otherwise recovery is
+    probed after probe_patience samples, which doubles after every failed recovery.
+    """
+    def __init__(self, source_fps: float, runners: dict, budget_ms: float = INFERENCE_BUDGET_MS,
+                 model1_min_fps: float = MODEL1_MIN_FPS, reduced_fps_factor: float = 0.5,
+                 recover_ratio: float = 0.6, patience: int = 10, smoothing: float = 0.2):
+        self.source_fps = source_fps
+        self.runners = runners
+        self.budget_ms = budget_ms or 1000.0 / source_fps
+        self.model1_min_fps = model1_min_fps
+        self.recover_ratio = recover_ratio  # Latency must drop below budget * recover_ratio to step back up
+        self.patience = patience            # Consecutive frames over/under budget before changing level
+        self.smoothing = smoothing          # Weight of the newest sample in the latency average
+        # Frames are checked at the source cadence, so the reduced rate is source_fps / stride
+        # for the largest whole stride that keeps model1 at or above its floor.
+        max_stride = max(1, round(1 / reduced_fps_factor))
+        self.reduced_stride = max(
+            (stride for stride in range(1, max_stride + 1) if source_fps / stride >= model1_min_fps),
+            default=1
+        )
+        # Skip the reduced fps level entirely when the floor leaves nothing to reduce
+        self.max_level = len(DEGRADATION_LEVELS) - 1
+        if self.reduced_stride == 1:
+            self.max_level -= 1
+        self.level = 0
+        self.avg_latency_ms = None
+        self.level_latency_ms = [None] * len(DEGRADATION_LEVELS)  # Last smoothed latency seen at each level
+        self.over_budget_count = 0
+        self.under_budget_count = 0
+        self.within_budget_count = 0
+        self.base_probe_patience = patience * 4
+        self.max_probe_patience = patience * 64
+        self.probe_patience = self.base_probe_patience
+        self.recovering_level = None   # Level stepped up into that has not yet proven to fit
+        self.skipped_frames = 0
+
+    @property
+    def settings(self) -> dict:
+        return DEGRADATION_LEVELS[self.level]
+
+    def inference_stride(self) -> int:
+        """Number of source frames each inference stands for at the current level."""
+        return self.reduced_stride if self.settings["reduce_fps"] else 1
+
+    def inference_fps(self) -> float:
+        return self.source_fps / self.inference_stride()
+
+    def should_infer(self) -> bool:
+        """Check whether the next source frame is due for inference at the current level."""
+        if self.skipped_frames >= self.inference_stride() - 1:
+            self.skipped_frames = 0
+            return True
+        self.skipped_frames += 1
+        return False
+
+    def run(self, frame) -> dict:
+        """Run the models enabled at the current level on frame, recording the inference latency."""
+        settings = self.settings
+        start = time.perf_counter()
+        results = run_models(self.runners, frame, models=settings["models"], imgsz=settings["imgsz"])
+        self.record((time.perf_counter() - start) * 1000)
+        return results
+
+    def record(self, latency_ms: float):
+        """Feed one inference latency sample and step the degradation level if needed."""
+        if self.avg_latency_ms is None:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms += self.smoothing * (latency_ms - self.avg_latency_ms)
+        self.level_latency_ms[self.level] = self.avg_latency_ms
+
+        if self.avg_latency_ms <= self.budget_ms:
+            self.within_budget_count += 1
+        else:
+            self.within_budget_count = 0
+        if self.recovering_level == self.level and self.within_budget_count >= self.patience:
+            # The recovered level holds, so the next recovery need not wait for a probe
+            self.recovering_level = None
+            self.probe_patience = self.base_probe_patience
+
+        if self.avg_latency_ms > self.budget_ms:
+            self.over_budget_count += 1
+            self.under_budget_count = 0
+        elif self.avg_latency_ms < self.budget_ms * self.recover_ratio:
+            self.under_budget_count += 1
+            self.over_budget_count = 0
+        else:
+            self.over_budget_count = 0
+            self.under_budget_count = 0
+
+        if self.over_budget_count >= self.patience and self.level < self.max_level:
+            if self.recovering_level == self.level:
+                # Recovery failed; wait twice as long before probing this level again
+                self.probe_patience = min(self.probe_patience * 2, self.max_probe_patience)
+            self.recovering_level = None
+            self._set_level(self.level + 1)
+        elif self.under_budget_count >= self.patience and self.level > 0:
+            previous_latency_ms = self.level_latency_ms[self.level - 1]
+            if (previous_latency_ms is None or previous_latency_ms <= self.budget_ms
+                    or self.under_budget_count >= self.probe_patience):
+                self._set_level(self.level - 1)
+                self.recovering_level = self.level
+
+    def _set_level(self, level: int):
+        logging.warning(
+            "Load shedding: %s -> %s (avg inference latency %.1f ms, budget %.1f ms)",
+            DEGRADATION_LEVELS[self.level]["name"], DEGRADATION_LEVELS[level]["name"],
+            self.avg_latency_ms, self.budget_ms
+        )
+        self.level = level
+        # Resume from what this level last measured rather than the latency of the old level
+        self.avg_latency_ms = self.level_latency_ms[level]
+        self.over_budget_count = 0
+        self.under_budget_count = 0
+        self.within_budget_count = 0
+        self.skipped_frames = 0
+
+    def status(self) -> dict:
+        return {
+            "load_level": self.settings["name"],
+            "inference_latency_ms": round(self.avg_latency_ms or 0.0, 1),
+            "inference_fps": round(self.inference_fps(), 1)
+        }
@@ -16,13 +16,18 @@ from fastapi.staticfiles import StaticFiles
 from starlette.staticfiles import StaticFiles
 
 from app.detection import (
-    run_all_models,
+    load_models,
+    MODEL_RUNNERS,
     process_alerts,       # Accepts an extra parameter: trigger_call (bool)
     process_review_alert,
     save_video_clip,
     BUFFER_SECONDS,
-    SeverityTracker      # Sliding window tracker for severity calculation
+    SeverityTracker,     # Sliding window tracker for severity calculation
+    FrameClock,          # Stamps frames with their capture (event) time
+    interval_elapsed
 )
+from app.load_shedding import LoadShedder  # Adaptive controller that degrades inference under load
+from app.config import VIDEO_SOURCE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -36,6 +41,9 @@ detection_status = {
     "detections": 0,
     "last_update": "",
     "alert": "",
+    "load_level": "FULL",           # Current load shedding degradation level
+    "inference_latency_ms": 0.0,
+    "inference_fps": 0.0,
     "logs": []  # Stores recent log entries
 }
 detection_status_lock = Lock()
@@ -49,8 +57,11 @@ app_settings = {
     "emergency_call_interval": 30         # Minimum seconds between successive emergency calls
 }
 
-last_telegram_alert_time = 0
-last_emergency_call_time = 0
+# Event timestamps (wall-clock seconds) of the last alerts, shared by all live camera streams
+live_alert_times = {
+    "telegram": None,
+    "emergency_call": None
+}
 
 os.makedirs(app_settings["video_save_path"], exist_ok=True)
 
@@ -61,45 +72,67 @@ app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# Instantiate a global severity tracker with a sliding window (in seconds)
+# Instantiate a global severity tracker with a sliding window (in seconds), shared by live camera streams
 severity_tracker = SeverityTracker(window_size=5)
 
 # --------------------------------------------------
 # Detection Frame Generator with Thread-Safe Updates
 # --------------------------------------------------
 def detection_frame_generator():
-    global last_telegram_alert_time, last_emergency_call_time, detection_status, incident_history, severity_tracker
+    global detection_status, incident_history, severity_tracker
 
-    # Use default camera capture for cross-platform compatibility
-    cap = cv2.VideoCapture(0)
+    # Camera index or video file/stream URL, configured through VIDEO_SOURCE
+    cap = cv2.VideoCapture(VIDEO_SOURCE)
     if not cap.isOpened():
-        logging.error("Error: Cannot access the webcam.")
+        logging.error("Error: Cannot open video source %s.", VIDEO_SOURCE)
         return
 
     fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
-    # Buffer for saving video clips when an alert is triggered
+    # Buffer of (capture timestamp, frame) tuples for saving video clips when an alert is triggered
     frame_buffer = deque(maxlen=fps * (BUFFER_SECONDS * 2))
+    frame_clock = FrameClock(VIDEO_SOURCE, fps)
+    if frame_clock.use_pts:
+        # Recorded or replayed video runs on its own timeline, possibly faster than real time,
+        # so it gets its own severity window and rate limits instead of the live ones
+        tracker = SeverityTracker(window_size=severity_tracker.window_size)
+        alert_times = {"telegram": None, "emergency_call": None}
+    else:
+        tracker = severity_tracker
+        alert_times = live_alert_times
+        # Camera frames are stamped when grabbed, so keep as few as possible queued in the driver
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    load_models()
+    load_shedder = LoadShedder(source_fps=fps, runners=MODEL_RUNNERS)
+    model_results = {}
 
     while cap.isOpened():
-        ret, frame = cap.read()
+        # Stamp the frame at capture so all downstream logic runs on event time
+        ret, frame, capture_time = frame_clock.read(cap)
         if not ret:
             logging.error("Error: Cannot read frame.")
             break
 
-        scaled_frame = frame.copy()
-        frame_buffer.append(scaled_frame)
+        # Event time in wall-clock seconds, the domain shared by every live stream
+        current_time = frame_clock.to_wall(capture_time)
+        current_dt = frame_clock.to_datetime(capture_time)
 
-        current_time = time.time()
+        scaled_frame = frame.copy()
+        frame_buffer.append((current_time, scaled_frame))
 
-        # Run all models concurrently on the current frame
-        model_results = run_all_models(frame)
+        # Run the models enabled at the current load level; when the inference fps is
+        # reduced, skipped frames reuse the last results without re-counting detections
+        inferred = load_shedder.should_infer()
+        if inferred:
+            model_results = load_shedder.run(frame)
         model1_results = model_results.get("model1", [])
 
-        # Update the severity tracker with detections
-        for det in model1_results:
-            severity_tracker.add_detection(current_time, det["confidence"])
+        # Update the severity tracker with detections, weighting each one by the number of
+        # source frames it stands for so the count threshold keeps its meaning at reduced fps
+        if inferred:
+            for det in model1_results:
+                tracker.add_detection(current_time, det["confidence"], weight=load_shedder.inference_stride())
 
-        severity_info = severity_tracker.get_severity()
+        severity_info = tracker.get_severity(current_time)
         severity = severity_info["level"]
         detection_count = severity_info["count"]
         max_conf = severity_info["max_confidence"]
@@ -109,7 +142,8 @@ def detection_frame_generator():
             detection_status["level"] = severity
             detection_status["max_confidence"] = round(max_conf, 2)
             detection_status["detections"] = detection_count
-            detection_status["last_update"] = time.strftime("%H:%M:%S")
+            detection_status["last_update"] = current_dt.strftime("%H:%M:%S")
+            detection_status.update(load_shedder.status())
 
         # Draw bounding boxes on the frame for model1 detections
         for det in model1_results:
@@ -120,19 +154,23 @@ def detection_frame_generator():
             f"Severity: {severity} | "
             f"Confidence: {round(max_conf,2)} | "
             f"Detections: {detection_count} | "
-            f"Last Update: {time.strftime('%H:%M:%S')}"
+            f"Last Update: {current_dt.strftime('%H:%M:%S')}"
         )
         cv2.putText(frame, overlay_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
         # Alert triggering logic with rate limiting and thread-safe updates
         if severity == "HIGH":
-            telegram_allowed = (current_time - last_telegram_alert_time) >= app_settings["telegram_alert_interval"]
-            call_allowed = (current_time - last_emergency_call_time) >= app_settings["emergency_call_interval"]
+            telegram_allowed = interval_elapsed(alert_times["telegram"], current_time, app_settings["telegram_alert_interval"])
+            call_allowed = interval_elapsed(alert_times["emergency_call"], current_time, app_settings["emergency_call_interval"])
             if telegram_allowed or call_allowed:
                 video_filename = f"violent_clip_{int(current_time)}.mp4"
                 video_path = os.path.join(app_settings["video_save_path"], video_filename)
-                saved_path = save_video_clip(frame_buffer, video_path, fps)
-                current_dt = datetime.now()
+                saved_path = save_video_clip(
+                    frame_buffer, video_path, fps,
+                    start_time=current_time - BUFFER_SECONDS * 2, end_time=current_time
+                )
+                # Latency from frame capture to alert dispatch
+                latency_ms = round((time.monotonic() - frame_clock.to_monotonic(capture_time)) * 1000, 1)
                 base_message = (
                     f"🚨 Violent Activity Detected!\n"
                     f"Date: {current_dt.strftime('%Y-%m-%d')}\n"
@@ -141,7 +179,7 @@ def detection_frame_generator():
                     f"Confidence: {max_conf:.2f}\n"
                     f"Detections: {detection_count}"
                 )
-                log_entry = f"{current_dt.strftime('%H:%M:%S')} - HIGH alert (Confidence: {max_conf:.2f}, Detections: {detection_count})"
+                log_entry = f"{current_dt.strftime('%H:%M:%S')} - HIGH alert (Confidence: {max_conf:.2f}, Detections: {detection_count}, Latency: {latency_ms} ms)"
                 with detection_status_lock:
                     detection_status["logs"].append(log_entry)
                     if len(detection_status["logs"]) > 10:
@@ -151,9 +189,9 @@ def detection_frame_generator():
                     "model3": model_results.get("model3", [])
                 }
                 if telegram_allowed:
-                    last_telegram_alert_time = current_time
+                    alert_times["telegram"] = current_time
                 if call_allowed:
-                    last_emergency_call_time = current_time
+                    alert_times["emergency_call"] = current_time
                 Thread(target=process_alerts, args=(saved_path, base_message, extra_info, call_allowed)).start()
                 with incident_history_lock:
                     incident_history.append({
@@ -162,18 +200,23 @@ def detection_frame_generator():
                         "severity": severity,
                         "confidence": round(max_conf, 2),
                         "detections": detection_count,
+                        "latency_ms": latency_ms,
                         "message": base_message
                     })
                 with detection_status_lock:
                     detection_status["alert"] = "High alert triggered: Telegram alert sent" + (", emergency call initiated." if call_allowed else ".")
                 # Reset the severity tracker after sending an alert
-                severity_tracker.detections.clear()
+                tracker.detections.clear()
         elif severity == "MILD":
-            if (current_time - last_telegram_alert_time) >= app_settings["telegram_alert_interval"]:
+            if interval_elapsed(alert_times["telegram"], current_time, app_settings["telegram_alert_interval"]):
                 video_filename = f"violent_clip_{int(current_time)}.mp4"
                 video_path = os.path.join(app_settings["video_save_path"], video_filename)
-                saved_path = save_video_clip(frame_buffer, video_path, fps)
-                current_dt = datetime.now()
+                saved_path = save_video_clip(
+                    frame_buffer, video_path, fps,
+                    start_time=current_time - BUFFER_SECONDS * 2, end_time=current_time
+                )
+                # Latency from frame capture to alert dispatch
+                latency_ms = round((time.monotonic() - frame_clock.to_monotonic(capture_time)) * 1000, 1)
                 base_message = (
                     f"🚨 Violent Activity Detected!\n"
                     f"Date: {current_dt.strftime('%Y-%m-%d')}\n"
@@ -182,7 +225,7 @@ def detection_frame_generator():
                     f"Confidence: {max_conf:.2f}\n"
                     f"Detections: {detection_count}"
                 )
-                log_entry = f"{current_dt.strftime('%H:%M:%S')} - MILD alert (Confidence: {max_conf:.2f}, Detections: {detection_count})"
+                log_entry = f"{current_dt.strftime('%H:%M:%S')} - MILD alert (Confidence: {max_conf:.2f}, Detections: {detection_count}, Latency: {latency_ms} ms)"
                 with detection_status_lock:
                     detection_status["logs"].append(log_entry)
                     if len(detection_status["logs"]) > 10:
@@ -191,7 +234,7 @@ def detection_frame_generator():
                     "model2": model_results.get("model2", []),
                     "model3": model_results.get("model3", [])
                 }
-                last_telegram_alert_time = current_time
+                alert_times["telegram"] = current_time
                 Thread(target=process_review_alert, args=(saved_path, base_message, extra_info)).start()
                 with incident_history_lock:
                     incident_history.append({
@@ -200,12 +243,13 @@ def detection_frame_generator():
                         "severity": severity,
                         "confidence": round(max_conf, 2),
                         "detections": detection_count,
+                        "latency_ms": latency_ms,
                         "message": base_message
                     })
                 with detection_status_lock:
                     detection_status["alert"] = "Mild alert triggered: Telegram review alert sent."
                 # Reset the severity tracker after sending an alert
-                severity_tracker.detections.clear()
+                tracker.detections.clear()
             else:
                 with detection_status_lock:
                     detection_status["alert"] = ""
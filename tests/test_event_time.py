@@ -0,0 +1,108 @@
+# tests/test_event_time.py
+
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+import pytest
+
+from app.detection import FrameClock, SeverityTracker, interval_elapsed, save_video_clip
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture, replaying scripted CAP_PROP_POS_MSEC values."""
+    def __init__(self, pts_msec):
+        self.pts_msec = list(pts_msec)
+        self.index = -1
+
+    def grab(self):
+        self.index += 1
+        return self.index < len(self.pts_msec)
+
+    def retrieve(self):
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def get(self, prop):
+        assert prop == cv2.CAP_PROP_POS_MSEC
+        return self.pts_msec[self.index]
+
+
+def read_all(clock, cap):
+    timestamps = []
+    while True:
+        ret, frame, timestamp = clock.read(cap)
+        if not ret:
+            return timestamps
+        timestamps.append(timestamp)
+
+
+def test_pts_timestamps_start_at_zero_and_continue_after_backward_jump():
+    clock = FrameClock("replay.mp4", fps=25)
+    timestamps = read_all(clock, FakeCapture([0.0, 40.0, 80.0, 0.0, 40.0]))
+    assert timestamps == pytest.approx([0.0, 0.04, 0.08, 0.12, 0.16])
+
+
+def test_missing_pts_uses_nominal_frame_interval():
+    clock = FrameClock("replay.mp4", fps=25)
+    timestamps = read_all(clock, FakeCapture([-1.0, -1.0, 120.0]))
+    assert timestamps == pytest.approx([0.0, 0.04, 0.12])
+
+
+def test_faster_than_real_time_replay_is_never_captured_in_the_future():
+    clock = FrameClock("replay.mp4", fps=1)
+    cap = FakeCapture([i * 1000.0 for i in range(10)])
+    timestamps = []
+    while True:
+        ret, frame, timestamp = clock.read(cap)
+        if not ret:
+            break
+        assert clock.to_monotonic(timestamp) <= time.monotonic()
+        timestamps.append(timestamp)
+    # Event time still advances at video speed, not at decode speed
+    assert timestamps[-1] == pytest.approx(9.0)
+    assert clock.to_wall(timestamps[-1]) - clock.to_wall(0.0) == pytest.approx(9.0)
+
+
+def test_camera_frames_use_monotonic_grab_time():
+    class CameraCapture(FakeCapture):
+        def get(self, prop):
+            raise AssertionError("camera frames must not be stamped from CAP_PROP_POS_MSEC")
+
+    clock = FrameClock(0, fps=30)
+    before = time.monotonic()
+    timestamps = read_all(clock, CameraCapture([0.0] * 3))
+    assert before <= timestamps[0] <= timestamps[-1] <= time.monotonic()
+    assert clock.to_monotonic(timestamps[-1]) == timestamps[-1]
+
+
+def test_severity_window_follows_event_time_at_replay_speed():
+    tracker = SeverityTracker(window_size=5)
+    # Ten seconds of 30 fps video processed instantly
+    for i in range(300):
+        tracker.add_detection(i / 30, 0.9)
+    severity = tracker.get_severity(299 / 30)
+    assert severity["level"] == "HIGH"
+    assert 150 <= severity["count"] <= 151
+    assert tracker.get_severity(299 / 30 + 6)["count"] == 0
+
+
+def test_future_detections_and_alert_times_do_not_block_an_earlier_timeline():
+    tracker = SeverityTracker(window_size=5)
+    tracker.add_detection(1000.0, 0.9)
+    assert tracker.get_severity(50.0)["count"] == 0
+    assert interval_elapsed(1000.0, 50.0, 10)
+    assert not interval_elapsed(45.0, 50.0, 10)
+
+
+def test_save_video_clip_is_bounded_by_event_time(tmp_path):
+    frame_buffer = deque((i / 10, np.full((48, 64, 3), i, dtype=np.uint8)) for i in range(30))
+    output_path = str(tmp_path / "clip.mp4")
+    assert save_video_clip(frame_buffer, output_path, fps=10, start_time=1.0, end_time=2.0) == output_path
+    clip = cv2.VideoCapture(output_path)
+    frames = 0
+    while clip.read()[0]:
+        frames += 1
+    clip.release()
+    assert frames == 11
+    assert save_video_clip(frame_buffer, str(tmp_path / "empty.mp4"), fps=10, start_time=5.0) is None
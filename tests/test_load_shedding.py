@@ -0,0 +1,105 @@
+# tests/test_load_shedding.py
+
+import time
+
+from app.load_shedding import LoadShedder, DEGRADATION_LEVELS
+
+
+def make_stub_runners(latency, calls=None):
+    """Build stub model runners that sleep for latency["seconds"] and record their arguments."""
+    def make_runner(name):
+        def runner(frame, imgsz=None):
+            if calls is not None:
+                calls.append((name, imgsz))
+            time.sleep(latency["seconds"])
+            return [{"confidence": 0.9, "box": (0, 0, 10, 10), "class": 1}]
+        return runner
+    return {name: make_runner(name) for name in ("model1", "model2", "model3")}
+
+
+def drive(shedder, frames):
+    """Feed frames through the shedder the way the frame generator does."""
+    inferred = 0
+    for _ in range(frames):
+        if shedder.should_infer():
+            shedder.run(None)
+            inferred += 1
+    return inferred
+
+
+def test_degrades_under_load_and_recovers():
+    latency = {"seconds": 0.02}
+    calls = []
+    shedder = LoadShedder(source_fps=30, runners=make_stub_runners(latency, calls),
+                          budget_ms=10, model1_min_fps=5, patience=2, smoothing=1.0)
+
+    drive(shedder, 20)
+    assert shedder.settings["name"] == "REDUCED_FPS"
+    assert shedder.inference_stride() == 2
+    assert shedder.inference_fps() == 15
+    assert drive(shedder, 10) == 5
+    # Only model1 runs at the reduced levels, at the reduced model input size
+    calls.clear()
+    drive(shedder, 2)
+    assert calls == [("model1", DEGRADATION_LEVELS[-1]["imgsz"])]
+
+    latency["seconds"] = 0.0
+    drive(shedder, 120)
+    assert shedder.settings["name"] == "FULL"
+    assert shedder.status()["load_level"] == "FULL"
+    assert drive(shedder, 10) == 10
+
+
+def test_settles_instead_of_flapping_when_level_above_is_over_budget():
+    level_latency = {"FULL": 0.03, "SKIP_MODEL3": 0.03, "SKIP_MODEL2": 0.014,
+                     "REDUCED_RESOLUTION": 0.003, "REDUCED_FPS": 0.003}
+    shedder = None
+
+    def runner(frame, imgsz=None):
+        time.sleep(level_latency[shedder.settings["name"]])
+        return []
+
+    runners = {"model1": runner, "model2": lambda frame, imgsz=None: [], "model3": lambda frame, imgsz=None: []}
+    shedder = LoadShedder(source_fps=30, runners=runners, budget_ms=10, patience=2, smoothing=1.0)
+    drive(shedder, 6)
+    assert shedder.settings["name"] == "REDUCED_RESOLUTION"
+
+    # SKIP_MODEL2 was last seen over budget, so headroom here does not step straight back up
+    for _ in range(shedder.probe_patience - 1):
+        shedder.run(None)
+        assert shedder.settings["name"] == "REDUCED_RESOLUTION"
+
+    # Probes of the level above back off exponentially instead of flapping
+    levels = []
+    for _ in range(100):
+        shedder.run(None)
+        levels.append(shedder.settings["name"])
+    assert levels.count("REDUCED_RESOLUTION") >= 90
+    probes = [i for i in range(1, len(levels))
+              if levels[i] == "SKIP_MODEL2" and levels[i - 1] == "REDUCED_RESOLUTION"]
+    gaps = [later - earlier for earlier, later in zip(probes, probes[1:])]
+    assert len(probes) >= 2
+    assert gaps == sorted(gaps) and len(set(gaps)) == len(gaps)
+
+
+def test_full_quality_infers_every_frame():
+    shedder = LoadShedder(source_fps=30, runners=make_stub_runners({"seconds": 0.0}), budget_ms=10)
+    assert drive(shedder, 100) == 100
+
+
+def test_skips_fps_level_when_floor_allows_no_reduction():
+    latency = {"seconds": 0.02}
+    for source_fps, min_fps in ((30, 20), (25, 15)):
+        shedder = LoadShedder(source_fps=source_fps, runners=make_stub_runners(latency),
+                              budget_ms=10, model1_min_fps=min_fps, patience=2, smoothing=1.0)
+        drive(shedder, 20)
+        assert shedder.settings["name"] == "REDUCED_RESOLUTION"
+        assert drive(shedder, 10) == 10
+
+
+def test_reduced_fps_never_below_model1_floor():
+    shedder = LoadShedder(source_fps=30, runners=make_stub_runners({"seconds": 0.0}),
+                          model1_min_fps=10, reduced_fps_factor=0.25)
+    shedder.level = len(DEGRADATION_LEVELS) - 1
+    assert shedder.inference_fps() >= 10
+    assert drive(shedder, 30) / 30 * shedder.source_fps >= 10